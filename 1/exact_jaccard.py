@@ -0,0 +1,148 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import tempfile
+
+import numpy as np
+
+
+class ShingleStore:
+    """Shingle sets of all docs as sorted uint64 arrays packed into one flat array.
+
+    Doc i's shingles are values[offsets[i]:offsets[i + 1]]. Both arrays can be
+    saved as .npy files and memory-mapped back, so worker processes share them
+    without copying. The values are Python hash() of the shingle strings, which
+    is salted per interpreter (PYTHONHASHSEED), so a saved store is a per-run
+    scratch file: only compare it with shingles hashed in the same run.
+    """
+
+    def __init__(self, doc_ids: List[int], values: np.ndarray, offsets: np.ndarray,
+                 prefix: Optional[str] = None):
+        self.doc_ids = doc_ids
+        self.index: Dict[int, int] = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        self.values = values
+        self.offsets = offsets
+        self.sizes = np.diff(offsets)
+        self.prefix = prefix
+
+    @classmethod
+    def from_shingle_sets(cls, shingle_sets: Dict[int, Set[int]]) -> "ShingleStore":
+        doc_ids = list(shingle_sets.keys())
+        offsets = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        arrays = []
+        for i, doc_id in enumerate(doc_ids):
+            shingles = shingle_sets[doc_id]
+            # hash() gives signed 64-bit ints, reinterpret them as uint64
+            arr = np.fromiter(shingles, dtype=np.int64, count=len(shingles)).view(np.uint64)
+            arr.sort()
+            arrays.append(arr)
+            offsets[i + 1] = offsets[i] + len(arr)
+        values = np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.uint64)
+        return cls(doc_ids, values, offsets)
+
+    def save(self, prefix: str):
+        """Write values, offsets and doc ids as .npy files sharing the given prefix"""
+        np.save(f"{prefix}_values.npy", self.values)
+        np.save(f"{prefix}_offsets.npy", self.offsets)
+        np.save(f"{prefix}_ids.npy", np.asarray(self.doc_ids, dtype=np.int64))
+        self.prefix = prefix
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> "ShingleStore":
+        mode = 'r' if mmap else None
+        values = np.load(f"{prefix}_values.npy", mmap_mode=mode)
+        offsets = np.load(f"{prefix}_offsets.npy", mmap_mode=mode)
+        doc_ids = np.load(f"{prefix}_ids.npy").tolist()
+        return cls(doc_ids, values, offsets, prefix)
+
+    def shingles(self, doc_id: int) -> np.ndarray:
+        i = self.index[doc_id]
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+
+def sorted_intersection_size(a: np.ndarray, b: np.ndarray) -> int:
+    """Size of the intersection of two sorted arrays with unique values"""
+    if len(a) == 0 or len(b) == 0:
+        return 0
+    # Binary search the smaller array into the larger one
+    if len(a) > len(b):
+        a, b = b, a
+    idx = np.searchsorted(b, a)
+    idx[idx == len(b)] = 0
+    return int(np.count_nonzero(b[idx] == a))
+
+
+def _verify_batch(store: ShingleStore, batch: List[Tuple[int, int]]) -> List[Tuple[int, int, float]]:
+    results = []
+    for doc_id1, doc_id2 in batch:
+        a = store.shingles(doc_id1)
+        b = store.shingles(doc_id2)
+        if len(a) == 0 and len(b) == 0:
+            results.append((doc_id1, doc_id2, 1.0))
+            continue
+        inter = sorted_intersection_size(a, b)
+        results.append((doc_id1, doc_id2, inter / (len(a) + len(b) - inter)))
+    return results
+
+
+# Store memory-mapped once per worker process by _init_worker
+_worker_store: Optional[ShingleStore] = None
+
+
+def _init_worker(prefix: str):
+    global _worker_store
+    _worker_store = ShingleStore.load(prefix)
+
+
+def _verify_batch_in_worker(batch: List[Tuple[int, int]]) -> List[Tuple[int, int, float]]:
+    return _verify_batch(_worker_store, batch)
+
+
+class ExactJaccard:
+    """Verify candidate pairs with exact Jaccard similarity on a ShingleStore"""
+
+    def __init__(self, threshold: float = 0.0, batch_size: int = 1024,
+                 num_workers: Optional[int] = None, use_processes: bool = False):
+        self.t = threshold
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.use_processes = use_processes
+
+    def prefilter(self, store: ShingleStore, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Drop pairs whose size ratio bounds Jaccard below the threshold.
+
+        J(A, B) <= min(|A|, |B|) / max(|A|, |B|), so no intersection is needed.
+        """
+        pairs = list(pairs)
+        if not pairs or self.t <= 0:
+            return pairs
+        idx = np.array([(store.index[d1], store.index[d2]) for d1, d2 in pairs], dtype=np.int64)
+        s1 = store.sizes[idx[:, 0]]
+        s2 = store.sizes[idx[:, 1]]
+        lo = np.minimum(s1, s2)
+        hi = np.maximum(s1, s2)
+        bound = np.where(hi == 0, 1.0, lo / np.maximum(hi, 1))
+        keep = np.flatnonzero(bound >= self.t)
+        return [pairs[i] for i in keep]
+
+    def verify(self, store: ShingleStore, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int, float]]:
+        """Return (doc_id1, doc_id2, exact Jaccard) for pairs that pass the prefilter"""
+        pairs = self.prefilter(store, pairs)
+        batches = [pairs[i:i + self.batch_size] for i in range(0, len(pairs), self.batch_size)]
+        if len(batches) <= 1:
+            return _verify_batch(store, pairs)
+
+        if not self.use_processes:
+            # Only searchsorted and the comparisons release the GIL, the per-pair
+            # Python loop does not; use_processes scales better for many small pairs
+            with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+                return [r for rs in pool.map(lambda b: _verify_batch(store, b), batches) for r in rs]
+
+        # Worker processes memory-map the store from disk instead of pickling it
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = store.prefix
+            if prefix is None:
+                prefix = f"{tmp}/shingles"
+                ShingleStore(store.doc_ids, store.values, store.offsets).save(prefix)
+            with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker,
+                                     initargs=(prefix,)) as pool:
+                return [r for rs in pool.map(_verify_batch_in_worker, batches) for r in rs]
@@ -6,11 +6,14 @@ class LSH:
         self.b = num_bands
         self.r = num_rows_per_band
         self.t = threshold
+        # Bucket sizes per band, filled by find_candidate_pairs(record_bucket_sizes=True)
+        self.last_bucket_sizes: List[List[int]] = []
     
     def _hash_band(self, band: List[int]) -> int:
         return hash(tuple(band))
     
-    def find_candidate_pairs(self, sigs: List[List[int]], ids: List[int] = None) -> Set[Tuple[int, int]]:
+    def find_candidate_pairs(self, sigs: List[List[int]], ids: List[int] = None,
+                             record_bucket_sizes: bool = False) -> Set[Tuple[int, int]]:
         # Initialize buckets for each band
         buckets: Dict[int, Dict[int, Set[int]]] = {}
         
@@ -30,6 +33,8 @@ class LSH:
                     buckets[bi][bh] = set()
                 buckets[bi][bh].add(doc_id)
         
+        if record_bucket_sizes:
+            self.last_bucket_sizes = [[len(ds) for ds in buckets[bi].values()] for bi in range(self.b)]
         pairs = set()
         
         # find candidate pairs
@@ -1,13 +1,23 @@
 import os
+import sys
 import time
 import heapq
-from typing import List, Dict, Tuple
+import argparse
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import profiling
+from profiling import profiler
 from shingling import Shingling
 from compare_sets import CompareSets
 from minhashing import MinHashing
 from compare_signatures import CompareSignatures
 from lsh import LSH
 
+if TYPE_CHECKING:
+    from exact_jaccard import ExactJaccard
+
 def load_documents(data_dir: str, num_docs: int = 1000) -> Dict[int, str]:
     documents = {}
     doc_id = 0
@@ -31,27 +41,31 @@ def load_documents(data_dir: str, num_docs: int = 1000) -> Dict[int, str]:
 
 def calculate_jaccard_similarity(documents: Dict[int, str], shingling: Shingling) -> List[Tuple[int, int, float]]:
     shingle_sets = {}
-    for doc_id, content in documents.items():
-        shingle_sets[doc_id] = shingling.create_shingles(content)
+    with profiler.stage('shingling', pipeline='jaccard'):
+        for doc_id, content in documents.items():
+            shingle_sets[doc_id] = shingling.create_shingles(content)
+            profiler.observe('shingles_per_doc', len(shingle_sets[doc_id]))
 
     top_k = []
     K = 10
     doc_ids = list(documents.keys())
     
     # Compare all pairs
-    for i in range(len(doc_ids)):
-        for j in range(i + 1, len(doc_ids)):
-            sim = CompareSets.jaccard_similarity(
-                shingle_sets[doc_ids[i]],
-                shingle_sets[doc_ids[j]]
-            )
-            # Use heap to store the top 10 similar pairs
-            # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
-            if len(top_k) < K:
-                heapq.heappush(top_k, (sim, doc_ids[i], doc_ids[j]))
-            else:
-                if sim > top_k[0][0]:
-                    heapq.heapreplace(top_k, (sim, doc_ids[i], doc_ids[j]))
+    with profiler.stage('compare', pipeline='jaccard'):
+        for i in range(len(doc_ids)):
+            for j in range(i + 1, len(doc_ids)):
+                sim = CompareSets.jaccard_similarity(
+                    shingle_sets[doc_ids[i]],
+                    shingle_sets[doc_ids[j]]
+                )
+                # Use heap to store the top 10 similar pairs
+                # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
+                if len(top_k) < K:
+                    heapq.heappush(top_k, (sim, doc_ids[i], doc_ids[j]))
+                else:
+                    if sim > top_k[0][0]:
+                        heapq.heapreplace(top_k, (sim, doc_ids[i], doc_ids[j]))
+    profiler.count('pairs_compared', len(doc_ids) * (len(doc_ids) - 1) // 2, pipeline='jaccard')
     # Convert back to (doc_id1, doc_id2, sim) format and sort descending
     return [(d1, d2, s) for s, d1, d2 in sorted(top_k, key=lambda x: x[0], reverse=True)]
 
@@ -65,26 +79,29 @@ def find_similar_documents_shingling(results: List[Tuple[int, int, float]], thre
 
 def calculate_signature_similarity(documents: Dict[int, str], shingling: Shingling, minhashing: MinHashing) -> List[Tuple[int, int, float]]:
     signatures = {}
-    for doc_id, content in documents.items():
-        shingle_set = shingling.create_shingles(content)
-        signatures[doc_id] = minhashing.compute_signature(shingle_set)
+    with profiler.stage('minhashing', pipeline='minhash'):
+        for doc_id, content in documents.items():
+            shingle_set = shingling.create_shingles(content)
+            signatures[doc_id] = minhashing.compute_signature(shingle_set)
 
     top_k = []
     K = 10
     doc_ids = list(documents.keys())
 
-    for i in range(len(doc_ids)):
-        for j in range(i + 1, len(doc_ids)):
-            sim = CompareSignatures.signature_similarity(
-                signatures[doc_ids[i]],
-                signatures[doc_ids[j]]
-            )
-            # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
-            if len(top_k) < K:
-                heapq.heappush(top_k, (sim, doc_ids[i], doc_ids[j]))
-            else:
-                if sim > top_k[0][0]:
-                    heapq.heapreplace(top_k, (sim, doc_ids[i], doc_ids[j]))
+    with profiler.stage('compare', pipeline='minhash'):
+        for i in range(len(doc_ids)):
+            for j in range(i + 1, len(doc_ids)):
+                sim = CompareSignatures.signature_similarity(
+                    signatures[doc_ids[i]],
+                    signatures[doc_ids[j]]
+                )
+                # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
+                if len(top_k) < K:
+                    heapq.heappush(top_k, (sim, doc_ids[i], doc_ids[j]))
+                else:
+                    if sim > top_k[0][0]:
+                        heapq.heapreplace(top_k, (sim, doc_ids[i], doc_ids[j]))
+    profiler.count('pairs_compared', len(doc_ids) * (len(doc_ids) - 1) // 2, pipeline='minhash')
     # Convert back to (doc_id1, doc_id2, sim) format and sort descending
     return [(d1, d2, s) for s, d1, d2 in sorted(top_k, key=lambda x: x[0], reverse=True)]
 
@@ -97,11 +114,17 @@ def find_similar_documents_minhash(results: List[Tuple[int, int, float]], thresh
     return similar_pairs
 
 
-def calculate_lsh_similarity(documents: Dict[int, str], shingling: Shingling, minhashing: MinHashing, lsh: LSH) -> List[Tuple[int, int, float]]:
+def calculate_lsh_similarity(documents: Dict[int, str], shingling: Shingling, minhashing: MinHashing, lsh: LSH,
+                             exact: Optional["ExactJaccard"] = None) -> List[Tuple[int, int, float]]:
     signatures = {}
-    for doc_id, content in documents.items():
-        shingle_set = shingling.create_shingles(content)
-        signatures[doc_id] = minhashing.compute_signature(shingle_set)
+    shingle_sets = {}
+    with profiler.stage('minhashing', pipeline='lsh'):
+        for doc_id, content in documents.items():
+            shingle_set = shingling.create_shingles(content)
+            signatures[doc_id] = minhashing.compute_signature(shingle_set)
+            # Keep full shingle sets only when candidates are verified exactly
+            if exact is not None:
+                shingle_sets[doc_id] = shingle_set
 
     sig_list = []
     doc_ids = []
@@ -109,22 +132,41 @@ def calculate_lsh_similarity(documents: Dict[int, str], shingling: Shingling, mi
         sig_list.append(signatures[doc_id])
         doc_ids.append(doc_id)
 
-    candidate_pairs = lsh.find_candidate_pairs(sig_list, doc_ids)
+    with profiler.stage('candidates', pipeline='lsh'):
+        candidate_pairs = lsh.find_candidate_pairs(sig_list, doc_ids, record_bucket_sizes=profiler.enabled)
+    if profiler.enabled:
+        for sizes in lsh.last_bucket_sizes:
+            profiler.count('lsh_buckets', len(sizes))
+            for size in sizes:
+                profiler.observe('lsh_bucket_size', size)
+    profiler.count('lsh_candidate_pairs', len(candidate_pairs))
+
+    if exact is not None:
+        # Replace MinHash estimates with exact Jaccard of the candidate pairs
+        from exact_jaccard import ShingleStore
+        with profiler.stage('verify', pipeline='lsh'):
+            store = ShingleStore.from_shingle_sets(shingle_sets)
+            scored_pairs = exact.verify(store, candidate_pairs)
+        profiler.count('pairs_prefiltered', len(candidate_pairs) - len(scored_pairs), pipeline='lsh')
+        profiler.count('pairs_compared', len(scored_pairs), pipeline='lsh')
+    else:
+        scored_pairs = (
+            (doc_id1, doc_id2, CompareSignatures.signature_similarity(signatures[doc_id1], signatures[doc_id2]))
+            for doc_id1, doc_id2 in candidate_pairs
+        )
+        profiler.count('pairs_compared', len(candidate_pairs), pipeline='lsh')
 
     top_k = []
     K = 10
 
-    for doc_id1, doc_id2 in candidate_pairs:
-        sim = CompareSignatures.signature_similarity(
-            signatures[doc_id1],
-            signatures[doc_id2]
-        )
-        # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
-        if len(top_k) < K:
-            heapq.heappush(top_k, (sim, doc_id1, doc_id2))
-        else:
-            if sim > top_k[0][0]:
-                heapq.heapreplace(top_k, (sim, doc_id1, doc_id2))
+    with profiler.stage('compare', pipeline='lsh'):
+        for doc_id1, doc_id2, sim in scored_pairs:
+            # Store as (sim, doc_id1, doc_id2) so heap sorts by similarity
+            if len(top_k) < K:
+                heapq.heappush(top_k, (sim, doc_id1, doc_id2))
+            else:
+                if sim > top_k[0][0]:
+                    heapq.heapreplace(top_k, (sim, doc_id1, doc_id2))
     # Convert back to (doc_id1, doc_id2, sim) format and sort descending
     return [(d1, d2, s) for s, d1, d2 in sorted(top_k, key=lambda x: x[0], reverse=True)]
 
@@ -138,6 +180,19 @@ def find_similar_documents_lsh(results: List[Tuple[int, int, float]], threshold:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Find similar documents with shingling, MinHash and LSH")
+    profiling.add_profile_argument(parser)
+    parser.add_argument('--exact', action='store_true',
+                        help="verify LSH candidates with exact Jaccard similarity (needs numpy)")
+    parser.add_argument('--exact-workers', type=int, default=None,
+                        help="number of workers for exact verification")
+    parser.add_argument('--exact-batch-size', type=int, default=1024,
+                        help="candidate pairs per verification batch")
+    parser.add_argument('--exact-processes', action='store_true',
+                        help="verify batches in worker processes instead of threads")
+    args = parser.parse_args()
+    profiling.start(args)
+
     # Configuration
     data_dir = "data/twenty+newsgroups/20_newsgroups"
     k = 10  # Shingle length
@@ -156,9 +211,12 @@ def main():
     print(f"  Similarity threshold: {similarity_threshold}")
     print(f"  Number of docs: {num_docs}")
     print(f"  LSH bands: {num_bands}, rows per band: {num_rows_per_band}")
+    print(f"  LSH exact verification: {args.exact}")
     print()
     print("Loading docs...")
-    docs = load_documents(data_dir, num_docs)
+    with profiler.stage('load'):
+        docs = load_documents(data_dir, num_docs)
+    profiler.count('documents', len(docs))
     print()
     if len(docs) < 2:
         print("Error: Need at least 2 docs to compare")
@@ -169,6 +227,13 @@ def main():
     lsh = LSH(num_bands=num_bands, 
               num_rows_per_band=num_rows_per_band,
               threshold=similarity_threshold)
+    exact = None
+    if args.exact:
+        from exact_jaccard import ExactJaccard
+        exact = ExactJaccard(threshold=similarity_threshold,
+                             batch_size=args.exact_batch_size,
+                             num_workers=args.exact_workers,
+                             use_processes=args.exact_processes)
     
     # Shingling and Jaccard similarity
     print("Shingling and Jaccard Similarity")
@@ -209,7 +274,7 @@ def main():
     # LSH
     print("LSH")
     start_time = time.time()
-    results = calculate_lsh_similarity(docs, shingling, minhashing, lsh)
+    results = calculate_lsh_similarity(docs, shingling, minhashing, lsh, exact)
     lsh_time = time.time() - start_time
     
     print(f"Execution time: {lsh_time:.4f} seconds")
@@ -244,7 +309,12 @@ def main():
     print(f"  MinHash pairs: {len(mh_pairs_set)}")
     print(f"  LSH pairs: {len(lsh_pairs_set)}")
     print(f"  MinHash matches Shingling: {shingling_pairs_set == mh_pairs_set}")
-    print(f"  LSH candidate pairs: {len(lsh_pairs_set)} (may include false positives)")
+    if args.exact:
+        print(f"  LSH candidate pairs: {len(lsh_pairs_set)} (verified with exact Jaccard)")
+    else:
+        print(f"  LSH candidate pairs: {len(lsh_pairs_set)} (may include false positives)")
+
+    profiling.finish(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,3 +1,13 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import profiling
+from profiling import profiler
+
+
 def load_data(filename):
     data = []
     with open(filename, 'r') as f:
@@ -85,21 +95,29 @@ def apriori(data, min_support):
     
     # Find frequent 1-itemsets
     k = 1
-    frequent_k = get_frequent_1_itemsets(data, min_support)
+    with profiler.stage('count_support', level=k):
+        frequent_k = get_frequent_1_itemsets(data, min_support)
+    profiler.count('frequent_itemsets', len(frequent_k), level=k)
     all_frequent.update(frequent_k)
     # Iteratively find frequent k-itemsets for k >= 2
     k = 2
     while frequent_k:
         # Generate candidates
-        candidates = generate_candidates(frequent_k, k)
-        candidates = prune_candidates(candidates, frequent_k, k)
-        support_counts = count_support(data, candidates)
+        with profiler.stage('generate_candidates', level=k):
+            candidates = generate_candidates(frequent_k, k)
+        profiler.count('candidates_before_prune', len(candidates), level=k)
+        with profiler.stage('prune_candidates', level=k):
+            candidates = prune_candidates(candidates, frequent_k, k)
+        profiler.count('candidates_after_prune', len(candidates), level=k)
+        with profiler.stage('count_support', level=k):
+            support_counts = count_support(data, candidates)
         # Filter frequent itemsets
         frequent_k = {
             itemset: count 
             for itemset, count in support_counts.items() 
             if count >= min_support
         }
+        profiler.count('frequent_itemsets', len(frequent_k), level=k)
         all_frequent.update(frequent_k)
         k += 1
     return all_frequent
@@ -143,11 +161,17 @@ def generate_rules(frequent_itemsets, min_confidence):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Find frequent itemsets and association rules with Apriori")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start(args)
 
     filename = 'T10I4D100K.dat'
     min_support = int(input("Enter minimum support count (e.g., 1000): "))
     min_confidence = float(input("Enter minimum confidence (0-1, e.g., 0.5): "))
-    data = load_data(filename)
+    with profiler.stage('load'):
+        data = load_data(filename)
+    profiler.count('transactions', len(data))
     print(f"Loaded {len(data)} transactions")
     
     # Find frequent itemsets
@@ -163,7 +187,9 @@ def main():
     
     # Generate rules
     print("\nGenerating rules...")
-    rules = generate_rules(frequent_itemsets, data, min_support, min_confidence)
+    with profiler.stage('generate_rules'):
+        rules = generate_rules(frequent_itemsets, min_confidence)
+    profiler.count('rules', len(rules))
     print(f"Found {len(rules)} rules")
     
     # Display rules
@@ -189,6 +215,8 @@ def main():
             Y_str = sorted(list(Y))
             f.write(f"  {X_str} -> {Y_str}: support = {support}, confidence = {confidence:.4f}\n")
 
+    profiling.finish(args)
+
 if __name__ == '__main__':
     main()
 
@@ -1,6 +1,15 @@
 from typing import Set, FrozenSet, DefaultDict
 from collections import defaultdict
+import argparse
+import os
 import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import profiling
+from profiling import profiler
 
 
 def parse_edge(line: str) -> FrozenSet[int]:
@@ -16,6 +25,7 @@ class ReservoirSampler:
         self.sample_size = sample_size
         self.sample: Set[FrozenSet[int]] = set()
         self.stream_cnt = 0
+        self.evictions = 0
     
     def should_include(self) -> bool:
         """Decide whether the current element should be included in the sample"""
@@ -39,6 +49,7 @@ class ReservoirSampler:
             edge_to_remove = random.choice(list(self.sample))
             self.sample.remove(edge_to_remove)
             self.sample.add(edge)
+            self.evictions += 1
 
 
 class StreamingTriangleCounter:
@@ -96,18 +107,38 @@ class StreamingTriangleCounter:
     
     def run(self) -> float:
         """Run algorithm to process stream data"""
-        with open(self.file_path, 'r') as f:
-            for line in f:
-                edge = parse_edge(line.strip())
-                self.edge_cnt += 1
-                eta = self.get_estimation_factor()
-                self.update_triangles(edge, eta)
-                if self.reservoir.should_include():
-                    self.reservoir.add(edge)
+        start = time.perf_counter()
+        with profiler.stage('stream', memory_size=self.memory_size):
+            with open(self.file_path, 'r') as f:
+                for line in f:
+                    edge = parse_edge(line.strip())
+                    self.edge_cnt += 1
+                    eta = self.get_estimation_factor()
+                    self.update_triangles(edge, eta)
+                    if self.reservoir.should_include():
+                        self.reservoir.add(edge)
+        self.record_metrics(time.perf_counter() - start)
         return self.triangle_count
 
+    def record_metrics(self, elapsed: float):
+        """Report stream counters to the profiler, once per run to keep the edge loop cheap"""
+        if not profiler.enabled:
+            return
+        M = self.memory_size
+        profiler.count('edges', self.edge_cnt, memory_size=M)
+        profiler.count('reservoir_evictions', self.reservoir.evictions, memory_size=M)
+        profiler.gauge('reservoir_size', len(self.reservoir.sample), memory_size=M)
+        profiler.gauge('triangle_estimate', self.triangle_count, memory_size=M)
+        if elapsed > 0:
+            profiler.observe('edges_per_second', self.edge_cnt / elapsed, memory_size=M)
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate triangle count with Triest")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
     memory_sizes = [1000, 2000, 5000, 10000, 20000]
     num_runs = 5
     file_path = 'data/facebook_combined.txt'
@@ -124,3 +155,5 @@ if __name__ == "__main__":
             avg = sum(results) / len(results)
             f.write(f"M={memory_size}, Average: {avg:.2f}\n\n")
 
+    profiling.finish(args)
+
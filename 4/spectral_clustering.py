@@ -0,0 +1,281 @@
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh, lobpcg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import profiling
+from profiling import profiler
+
+
+def load_edges(file_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Load edge list from comma separated file, extra columns (weights) are ignored"""
+    data = np.loadtxt(file_path, delimiter=',', usecols=(0, 1), dtype=np.int64, ndmin=2)
+    return data[:, 0], data[:, 1]
+
+
+def index_base(col1: np.ndarray, col2: np.ndarray) -> int:
+    """Node ids are 0-based if any id is 0, otherwise 1-based (as in spectral_clustering.m)"""
+    return 0 if min(col1.min(), col2.min()) == 0 else 1
+
+
+def build_adjacency(col1: np.ndarray, col2: np.ndarray) -> sp.csr_matrix:
+    """Build symmetric, unweighted sparse adjacency matrix, row i is node id i + index_base"""
+    # Convert to 0-based indexing if necessary
+    base = index_base(col1, col2)
+    rows = col1 - base
+    cols = col2 - base
+    n = int(max(rows.max(), cols.max())) + 1
+
+    # Add both directions to make it symmetric
+    A = sp.coo_matrix(
+        (np.ones(2 * len(rows)), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(n, n)
+    ).tocsr()
+
+    # Remove duplicates/weights
+    A.data[:] = 1.0
+    return A
+
+
+def normalized_adjacency(A: sp.csr_matrix) -> sp.csr_matrix:
+    """Compute D^(-1/2) * A * D^(-1/2)"""
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+    d_inv_sqrt = 1.0 / np.sqrt(degrees + np.finfo(float).eps)
+    D_inv_sqrt = sp.diags(d_inv_sqrt)
+    return (D_inv_sqrt @ A @ D_inv_sqrt).tocsr()
+
+
+def normalized_laplacian(A: sp.csr_matrix) -> sp.csr_matrix:
+    """Compute normalized Laplacian L_sym = I - D^(-1/2) * A * D^(-1/2)"""
+    n = A.shape[0]
+    return (sp.identity(n, format='csr') - normalized_adjacency(A)).tocsr()
+
+
+def smallest_eigenpairs(A: sp.csr_matrix, num_eigs: int = 20, tol: float = 1e-6,
+                        method: str = 'lanczos', x0: Optional[np.ndarray] = None,
+                        max_iter: Optional[int] = None, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the smallest eigenpairs of the normalized Laplacian of A, sorted ascending.
+
+    The smallest eigenvalues of L_sym are 1 - the largest eigenvalues of
+    D^(-1/2) * A * D^(-1/2), which iterative solvers converge on much faster
+    than the small end of L without a shift-invert factorization.
+    x0 is an optional warm start (e.g. eigenvectors from a previous run).
+    """
+    M = normalized_adjacency(A)
+    n = M.shape[0]
+    num_eigs = min(num_eigs, n - 1)
+
+    if method == 'lanczos':
+        v0 = None
+        if x0 is not None:
+            # Lanczos takes a single starting vector, so combine the warm start block
+            v0 = np.asarray(x0, dtype=float).reshape(n, -1).sum(axis=1)
+        vals, vecs = eigsh(M, k=num_eigs, which='LA', tol=tol, v0=v0, maxiter=max_iter)
+    elif method == 'lobpcg':
+        if x0 is None:
+            rng = np.random.default_rng(seed)
+            X = rng.standard_normal((n, num_eigs))
+        else:
+            X = np.asarray(x0, dtype=float).reshape(n, -1)
+            if X.shape[1] < num_eigs:
+                rng = np.random.default_rng(seed)
+                X = np.hstack([X, rng.standard_normal((n, num_eigs - X.shape[1]))])
+            X = X[:, :num_eigs]
+        vals, vecs = lobpcg(M, X, tol=tol, maxiter=max_iter or 500, largest=True)
+    else:
+        raise ValueError(f"Unknown eigensolver method: {method}")
+
+    # Convert back to Laplacian eigenvalues and sort ascending
+    vals = 1.0 - vals
+    idx = np.argsort(vals)
+    return vals[idx], vecs[:, idx]
+
+
+def eigengap_k(eigenvalues: np.ndarray, max_k: Optional[int] = None) -> int:
+    """Choose K where the largest gap between consecutive eigenvalues occurs"""
+    vals = np.sort(eigenvalues)
+    if max_k is not None:
+        vals = vals[:max_k + 1]
+    if len(vals) < 2:
+        return 1
+    # Gap after index i means the first i + 1 eigenvalues form the clusters
+    return int(np.argmax(np.diff(vals))) + 1
+
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length"""
+    row_norms = np.sqrt((X ** 2).sum(axis=1))
+    row_norms[row_norms < np.finfo(float).eps] = 1.0
+    return X / row_norms[:, None]
+
+
+def _squared_distances(X: np.ndarray, X_sq: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Squared euclidean distances between every point and every center"""
+    dist = X_sq[:, None] - 2.0 * (X @ centers.T) + (centers ** 2).sum(axis=1)[None, :]
+    np.maximum(dist, 0.0, out=dist)
+    return dist
+
+
+def _kmeans_plus_plus(X: np.ndarray, X_sq: np.ndarray, K: int, rng: np.random.Generator) -> np.ndarray:
+    """Pick initial centers with k-means++ seeding"""
+    n = X.shape[0]
+    centers = np.empty((K, X.shape[1]))
+    centers[0] = X[rng.integers(n)]
+    closest = _squared_distances(X, X_sq, centers[:1]).ravel()
+
+    for c in range(1, K):
+        total = closest.sum()
+        if total <= 0:
+            centers[c] = X[rng.integers(n)]
+        else:
+            centers[c] = X[rng.choice(n, p=closest / total)]
+        closest = np.minimum(closest, _squared_distances(X, X_sq, centers[c:c + 1]).ravel())
+
+    return centers
+
+
+def _kmeans_single(X: np.ndarray, K: int, max_iter: int, tol: float,
+                   seed: np.random.SeedSequence) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Run one k-means replicate, return (inertia, labels, centers)"""
+    rng = np.random.default_rng(seed)
+    X_sq = (X ** 2).sum(axis=1)
+    centers = _kmeans_plus_plus(X, X_sq, K, rng)
+    n = X.shape[0]
+    labels = np.zeros(n, dtype=np.int64)
+    ones = np.ones(n)
+    points = np.arange(n)
+
+    for _ in range(max_iter):
+        dist = _squared_distances(X, X_sq, centers)
+        labels = dist.argmin(axis=1)
+
+        # Recompute centers as the mean of assigned points
+        counts = np.bincount(labels, minlength=K)
+        # Sum points per cluster with a sparse K x n one-hot matrix product
+        assign = sp.csr_matrix((ones, (labels, points)), shape=(K, n))
+        new_centers = np.asarray(assign @ X)
+        empty = counts == 0
+        new_centers[~empty] /= counts[~empty, None]
+        # Reseed empty clusters with the points furthest from their center
+        if empty.any():
+            far = np.argsort(dist[np.arange(len(labels)), labels])[::-1][:empty.sum()]
+            new_centers[empty] = X[far]
+
+        shift = ((new_centers - centers) ** 2).sum()
+        centers = new_centers
+        if shift <= tol:
+            break
+
+    dist = _squared_distances(X, X_sq, centers)
+    labels = dist.argmin(axis=1)
+    inertia = float(dist[np.arange(len(labels)), labels].sum())
+    return inertia, labels, centers
+
+
+def kmeans(X: np.ndarray, K: int, replicates: int = 20, max_iter: int = 1000,
+           tol: float = 1e-8, seed: int = 42, n_jobs: Optional[int] = None) -> np.ndarray:
+    """Run k-means with several replicates in parallel, return labels of the best one"""
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+
+    # Replicates share X across threads; only the BLAS/sparse products overlap,
+    # the per-iteration Python overhead still runs one thread at a time
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        runs = list(pool.map(lambda s: _kmeans_single(X, K, max_iter, tol, s), seeds))
+
+    best_inertia, best_labels, _ = min(runs, key=lambda r: r[0])
+    return best_labels
+
+
+class SpectralClustering:
+    """Spectral clustering (Ng, Jordan, Weiss) on sparse graphs"""
+
+    def __init__(self, num_eigs: int = 20, K: Optional[int] = None, tol: float = 1e-6,
+                 method: str = 'lanczos', replicates: int = 20, max_iter: int = 1000,
+                 seed: int = 42, n_jobs: Optional[int] = None):
+        self.num_eigs = num_eigs
+        self.K = K
+        self.tol = tol
+        self.method = method
+        self.replicates = replicates
+        self.max_iter = max_iter
+        self.seed = seed
+        self.n_jobs = n_jobs
+
+        self.eigenvalues: Optional[np.ndarray] = None
+        self.eigenvectors: Optional[np.ndarray] = None
+        self.labels: Optional[np.ndarray] = None
+        self.n_clusters: Optional[int] = None
+
+    def fit(self, A: sp.csr_matrix, x0: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cluster the graph, reusing previous eigenvectors as warm start if available"""
+        if x0 is None and self.eigenvectors is not None and self.eigenvectors.shape[0] == A.shape[0]:
+            x0 = self.eigenvectors
+
+        with profiler.stage('eigensolver', method=self.method):
+            self.eigenvalues, self.eigenvectors = smallest_eigenpairs(
+                A, self.num_eigs, tol=self.tol, method=self.method, x0=x0, seed=self.seed
+            )
+
+        with profiler.stage('eigengap'):
+            K = self.K if self.K is not None else eigengap_k(self.eigenvalues)
+        if K > self.eigenvectors.shape[1]:
+            raise ValueError(f"K={K} needs at least {K} eigenvectors, "
+                             f"only {self.eigenvectors.shape[1]} were computed")
+        self.n_clusters = K
+        Y = normalize_rows(self.eigenvectors[:, :K])
+        with profiler.stage('kmeans', replicates=self.replicates):
+            self.labels = kmeans(Y, K, replicates=self.replicates, max_iter=self.max_iter,
+                                 seed=self.seed, n_jobs=self.n_jobs)
+        profiler.gauge('clusters', K)
+        return self.labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectral clustering of an edge list")
+    parser.add_argument('file_path', nargs='?', default='example1.dat')
+    parser.add_argument('--k', type=int, default=None, help="number of clusters (default: eigengap)")
+    parser.add_argument('--num-eigs', type=int, default=20)
+    parser.add_argument('--tol', type=float, default=1e-6)
+    parser.add_argument('--method', choices=['lanczos', 'lobpcg'], default='lanczos')
+    parser.add_argument('--replicates', type=int, default=20)
+    parser.add_argument('--output', default=None, help="write node cluster labels to this file")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
+    with profiler.stage('load'):
+        col1, col2 = load_edges(args.file_path)
+        A = build_adjacency(col1, col2)
+    base = index_base(col1, col2)
+    profiler.count('nodes', A.shape[0])
+    profiler.count('edges', A.nnz // 2)
+    print(f"Loaded graph: {A.shape[0]} nodes and {A.nnz // 2} edges.")
+
+    model = SpectralClustering(num_eigs=args.num_eigs, K=args.k, tol=args.tol,
+                               method=args.method, replicates=args.replicates)
+    labels = model.fit(A)
+
+    print("Smallest eigenvalues:")
+    for i, val in enumerate(model.eigenvalues, start=1):
+        print(f"  {i}: {val:.6f}")
+    K = model.n_clusters
+    print(f"Eigengap suggests K={eigengap_k(model.eigenvalues)}, using K={K}")
+    print(f"Cluster sizes: {np.bincount(labels, minlength=K).tolist()}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for node, label in enumerate(labels, start=base):
+                f.write(f"{node},{label + 1}\n")
+
+    profiling.finish(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+from typing import Dict, List, Tuple, Optional
+from contextlib import contextmanager, nullcontext
+import argparse
+import json
+import math
+import time
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Histogram bucket upper bounds: powers of two up to ~1M, then +Inf
+HISTOGRAM_BUCKETS: List[float] = [float(2 ** i) for i in range(21)] + [math.inf]
+
+_NULL_STAGE = nullcontext()
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram, keeps counts only so memory does not grow with observations"""
+
+    def __init__(self):
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.sum / self.count if self.count else None,
+            'buckets': {
+                ('+Inf' if math.isinf(b) else str(int(b))): c
+                for b, c in zip(HISTOGRAM_BUCKETS, self.buckets)
+            },
+        }
+
+
+class Profiler:
+    """Opt-in collector for stage timings, counters, gauges and histograms.
+
+    Disabled by default: every method returns immediately, and stage()
+    hands back a shared no-op context manager. Hot loops should check
+    `profiler.enabled` before computing anything just to record it.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.stage_seconds: Dict[Tuple[str, LabelKey], float] = {}
+        self.stage_calls: Dict[Tuple[str, LabelKey], int] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.gauges: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def stage(self, name: str, **labels):
+        """Context manager timing a pipeline stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed_stage(name, _label_key(labels))
+
+    @contextmanager
+    def _timed_stage(self, name: str, labels: LabelKey):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = (name, labels)
+            self.stage_seconds[key] = self.stage_seconds.get(key, 0.0) + time.perf_counter() - start
+            self.stage_calls[key] = self.stage_calls.get(key, 0) + 1
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        """Set a gauge to the latest value"""
+        if not self.enabled:
+            return
+        self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Add an observation to a histogram"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    def to_dict(self) -> dict:
+        def rows(metrics: dict, convert=lambda v: v) -> List[dict]:
+            return [
+                {'name': name, 'labels': dict(labels), 'value': convert(value)}
+                for (name, labels), value in metrics.items()
+            ]
+
+        stages = [
+            {'name': name, 'labels': dict(labels), 'seconds': seconds,
+             'calls': self.stage_calls[(name, labels)]}
+            for (name, labels), seconds in self.stage_seconds.items()
+        ]
+        return {
+            'stages': stages,
+            'counters': rows(self.counters),
+            'gauges': rows(self.gauges),
+            'histograms': rows(self.histograms, lambda h: h.to_dict()),
+        }
+
+    def to_prometheus(self, prefix: str = 'id2222') -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def fmt_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(labels) + ([extra] if extra else [])
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        def emit(metric: str, kind: str, samples):
+            lines.append(f'# TYPE {metric} {kind}')
+            for labels, value in samples:
+                lines.append(f'{metric}{fmt_labels(labels)} {value}')
+
+        def stage_samples(metrics: dict):
+            return [(_label_key({'stage': name, **dict(labels)}), value)
+                    for (name, labels), value in metrics.items()]
+
+        if self.stage_seconds:
+            emit(f'{prefix}_stage_seconds_total', 'counter', stage_samples(self.stage_seconds))
+            emit(f'{prefix}_stage_calls_total', 'counter', stage_samples(self.stage_calls))
+
+        for kind, metrics, suffix in (('counter', self.counters, '_total'), ('gauge', self.gauges, '')):
+            by_name: Dict[str, list] = {}
+            for (name, labels), value in metrics.items():
+                by_name.setdefault(name, []).append((labels, value))
+            for name, samples in by_name.items():
+                emit(f'{prefix}_{name}{suffix}', kind, samples)
+
+        hist_by_name: Dict[str, list] = {}
+        for (name, labels), hist in self.histograms.items():
+            hist_by_name.setdefault(name, []).append((labels, hist))
+        for name, samples in hist_by_name.items():
+            metric = f'{prefix}_{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, hist in samples:
+                cumulative = 0
+                for bound, c in zip(HISTOGRAM_BUCKETS, hist.buckets):
+                    cumulative += c
+                    le = '+Inf' if math.isinf(bound) else str(int(bound))
+                    lines.append(f'{metric}_bucket{fmt_labels(labels, ("le", le))} {cumulative}')
+                lines.append(f'{metric}_sum{fmt_labels(labels)} {hist.sum}')
+                lines.append(f'{metric}_count{fmt_labels(labels)} {hist.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path: str):
+        """Write metrics to file, Prometheus text for .prom/.txt, JSON otherwise"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            if file_path.endswith(('.prom', '.txt')):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+
+# Shared instance used by all pipelines, enabled by the --profile switch
+profiler = Profiler()
+
+
+def add_profile_argument(parser: argparse.ArgumentParser):
+    """Add the --profile [PATH] switch shared by all entry points"""
+    parser.add_argument('--profile', nargs='?', const='profile.json', default=None, metavar='PATH',
+                        help="record stage metrics and write them to PATH (.json or .prom)")
+
+
+def start(args: argparse.Namespace):
+    """Enable the shared profiler if --profile was given"""
+    if args.profile:
+        profiler.enable()
+
+
+def finish(args: argparse.Namespace):
+    """Write the shared profiler's metrics if --profile was given"""
+    if args.profile:
+        profiler.write(args.profile)
+        print(f"Profile written to {args.profile}")